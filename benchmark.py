@@ -0,0 +1,205 @@
+"""Throughput benchmark for temp_mail against the local fake mail.tm server.
+
+Scenarios:
+    create    register accounts and fetch their tokens
+    poll      list the first inbox page of every account, repeatedly
+    download  stream every message of every account to disk
+    persist   upsert the accounts into the account store, then pick random ones
+
+Each scenario reports ops/sec, items/sec (accounts or messages), p50/p99
+latency, errors and the process's peak RSS after the scenario. Memory is
+read from getrusage rather than tracemalloc, whose allocation hooks would
+slow down the timed loop. Example:
+    python benchmark.py --accounts 200 --concurrency 32 --latency 0.02 --error-rate 0.01
+    python benchmark.py --url http://127.0.0.1:8025 --scenarios create,poll
+Use --json to save the results for comparison between runs.
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import tempfile
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from fake_mailtm import FakeMailServer, add_config_arguments, config_from_args
+
+SCENARIOS = ("create", "poll", "download", "persist")
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def _failed(result):
+    return result is None or isinstance(result, main.Failure) or (
+        isinstance(result, str) and result.startswith("Database")
+    )
+
+def max_rss_bytes():
+    """Peak resident set size of this process so far"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+def run_ops(name, fn, items, concurrency, count_items=None):
+    """Run fn over items on a thread pool and collect timing statistics.
+
+    `count_items(result)` gives how many accounts/messages one op handled
+    (default 1 per successful op).
+    """
+    latencies, errors, handled = [], 0, 0
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            result = fn(item)
+        except Exception as e:
+            result = main.Failure(main.MailTmError(f"Failed: {e}"))
+        return time.perf_counter() - start, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for latency, result in executor.map(timed, items):
+            latencies.append(latency)
+            if _failed(result):
+                errors += 1
+            else:
+                handled += count_items(result) if count_items else 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "ops": len(latencies),
+        "items": handled,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "items_per_sec": round(handled / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_rss_mb": round(max_rss_bytes() / 2**20, 1),
+    }
+
+def bench_create(url, n, concurrency):
+    accounts = []
+
+    def create(_):
+        mail = main.temp_mail(base_url=url)
+        result = mail.get_account()
+        if _failed(result):
+            return result
+        token = mail.get_token(save=False)
+        if not _failed(token):
+            accounts.append(mail)
+        return token
+
+    return run_ops("create", create, range(n), concurrency), accounts
+
+def bench_poll(accounts, rounds, concurrency):
+    def poll(mail):
+        return mail.get_messages()
+
+    return run_ops("poll", poll, accounts * rounds, concurrency,
+                   count_items=lambda data: len(data.get('hydra:member', [])))
+
+def bench_download(accounts, concurrency, folder, compression=None):
+    jobs = []
+    for mail in accounts:
+        try:
+            jobs += [(mail, msg['id']) for msg in mail.iter_messages()]
+        except main.MailTmError:
+            continue
+
+    def download(job):
+        mail, message_id = job
+        return mail.download_message(message_id, base_path=folder, compression=compression)
+
+    return run_ops("download", download, jobs, concurrency)
+
+def bench_persist(accounts, batch_size, lookups, concurrency):
+    rows = [(mail.adress, mail.password, mail.token) for mail in accounts]
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    main.get_account_store().bootstrap()
+    saved = run_ops("persist", lambda batch: main.save_accounts(batch, batch_size), batches, 1,
+                    count_items=lambda count: count)
+    reader = main.temp_mail("", "")
+    lookup = run_ops("random-pick", lambda _: reader.retrieve_random_user(), range(lookups), concurrency)
+    return [saved, lookup]
+
+def print_report(results):
+    columns = ["scenario", "ops", "items", "errors", "seconds", "ops_per_sec",
+               "items_per_sec", "p50_ms", "p99_ms", "max_rss_mb"]
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in results:
+        print("  ".join(str(row[c]).ljust(w) for c, w in zip(columns, widths)))
+    print(f"max RSS: {max_rss_bytes() / 2**20:.1f} MB")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark temp_mail against a fake mail.tm server")
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--poll-rounds", type=int, default=3)
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default=None)
+    parser.add_argument("--store", default="sqlite",
+                        help="account store for the persist scenario (mariadb, sqlite, memory)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--client-rate", type=float, default=0,
+                        help="client-side requests/sec limit (0 = only honour 429s)")
+    parser.add_argument("--json", help="write the results to this file")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Size the connection pool so the client is not the bottleneck
+    main.configure_session(pool_maxsize=max(args.concurrency, main.HTTP_CONFIG["pool_maxsize"]))
+    # A private, per-process bucket so the run neither throttles nor is throttled by real workers
+    main.configure_rate_limit(rate=args.client_rate, burst=max(1, int(args.client_rate)), state_file="")
+
+    server = None
+    if args.url is None:
+        server = FakeMailServer(config=config_from_args(args)).start()
+    url = args.url or server.url
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="temp_mail_bench_") as workdir:
+        store_options = {"backend": args.store}
+        if args.store == "sqlite":
+            store_options["sqlite_path"] = os.path.join(workdir, "accounts.sqlite")
+        main.configure_store(**store_options)
+        try:
+            # Every scenario after "create" needs accounts, so they are always created
+            created, accounts = bench_create(url, args.accounts, args.concurrency)
+            if "create" in scenarios:
+                results.append(created)
+            if "poll" in scenarios:
+                results.append(bench_poll(accounts, args.poll_rounds, args.concurrency))
+            if "download" in scenarios:
+                results.append(bench_download(accounts, args.concurrency,
+                                              os.path.join(workdir, "mail"), args.compression))
+            if "persist" in scenarios:
+                results += bench_persist(accounts, args.batch_size, args.accounts, args.concurrency)
+        finally:
+            if server is not None:
+                server.stop()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
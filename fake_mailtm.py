@@ -0,0 +1,357 @@
+"""Local stand-in for the mail.tm API, used by benchmark.py.
+
+Serves the endpoints temp_mail talks to (/domains, /accounts, /token, /me,
+/messages, /messages/{id}, /messages/{id}/download) from memory, with
+configurable latency, error rate and message size. A Mercure-style SSE hub
+at /.well-known/mercure pushes messages added with add_message(), so
+MercureSubscriber can run against it too.
+
+Run it standalone and point the client at it:
+    python fake_mailtm.py --port 8025 --latency 0.02 --error-rate 0.01
+    export TEMP_MAIL_API_URL=http://127.0.0.1:8025
+"""
+import argparse
+import base64
+import json
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+class FakeMailConfig():
+    """Behaviour knobs for the fake server"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 messages_per_inbox=30, message_size=4096, page_size=30,
+                 token_ttl=3600, domains=("fakemail.test",), heartbeat=15.0):
+        self.latency = latency                        # seconds added to every response
+        self.jitter = jitter                          # +/- uniform noise on the latency
+        self.error_rate = error_rate                  # fraction of requests answered with 503
+        self.rate_limit_rate = rate_limit_rate        # fraction answered with 429 + Retry-After
+        self.messages_per_inbox = messages_per_inbox  # messages seeded into each new inbox
+        self.message_size = message_size              # approximate raw message size in bytes
+        self.page_size = page_size
+        self.token_ttl = token_ttl
+        self.domains = list(domains)
+        self.heartbeat = heartbeat                    # seconds between SSE keep-alive comments
+
+def _fake_jwt(address, ttl):
+    """Unsigned JWT with the `exp` claim token_expiry() reads"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    payload = {"username": address, "iat": int(time.time()), "exp": int(time.time()) + ttl}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(payload)}.{uuid.uuid4().hex}"
+
+class FakeMailState():
+    """Accounts, tokens and seeded messages, shared by all handler threads"""
+
+    def __init__(self, config: FakeMailConfig):
+        self.config = config
+        self.accounts = {}   # address -> {"id", "password", "messages": [...]}
+        self.tokens = {}     # token -> address
+        self.requests = 0
+        self.streams = {}    # address -> queues of the open SSE streams
+        self.events = {}     # address -> [(event id, payload)] for Last-Event-ID replay
+        self.hub_available = True
+        self._event_ids = 0
+        self._lock = threading.Lock()
+
+    def create_account(self, address, password):
+        with self._lock:
+            if address in self.accounts:
+                return None
+            account = {"id": uuid.uuid4().hex, "password": password}
+            account["messages"] = [self._message(address, i) for i in range(self.config.messages_per_inbox)]
+            self.accounts[address] = account
+            return account
+
+    def add_message(self, address, subject=None, intro=None):
+        """Deliver a new message to an inbox and publish it to the SSE hub"""
+        with self._lock:
+            account = self.accounts[address]
+            message = self._message(address, len(account["messages"]))
+            if subject is not None:
+                message["subject"] = subject
+            if intro is not None:
+                message["intro"] = intro
+            account["messages"].insert(0, message)
+            self._event_ids += 1
+            event = (str(self._event_ids), {"@type": "Message", **message})
+            self.events.setdefault(address, []).append(event)
+            for stream in self.streams.get(address, []):
+                stream.put(event)
+        return message
+
+    def open_stream(self, address, last_event_id=None):
+        """Queue of events for one SSE connection, primed with those after last_event_id"""
+        stream = queue.Queue()
+        with self._lock:
+            if last_event_id is not None:
+                for event in self.events.get(address, []):
+                    if int(event[0]) > int(last_event_id):
+                        stream.put(event)
+            self.streams.setdefault(address, []).append(stream)
+        return stream
+
+    def close_stream(self, address, stream):
+        with self._lock:
+            streams = self.streams.get(address, [])
+            if stream in streams:
+                streams.remove(stream)
+
+    def drop_streams(self):
+        """Disconnect every open SSE stream, as a hub restart would"""
+        with self._lock:
+            for streams in self.streams.values():
+                for stream in streams:
+                    stream.put(None)
+
+    def _message(self, address, index):
+        created = datetime.now(timezone.utc).isoformat()
+        return {
+            "id": uuid.uuid4().hex,
+            "accountId": f"/accounts/{address}",
+            "msgid": f"<{uuid.uuid4().hex}@fakemail.test>",
+            "from": {"address": f"sender{index}@example.com", "name": f"Sender {index}"},
+            "to": [{"address": address, "name": ""}],
+            "subject": f"Message {index}",
+            "intro": f"Your code is {random.randint(100000, 999999)}",
+            "seen": False,
+            "hasAttachments": False,
+            "size": self.config.message_size,
+            "createdAt": created,
+            "updatedAt": created,
+        }
+
+    def issue_token(self, address, password):
+        with self._lock:
+            account = self.accounts.get(address)
+            if account is None or account["password"] != password:
+                return None
+            token = _fake_jwt(address, self.config.token_ttl)
+            self.tokens[token] = address
+            return token, account["id"]
+
+    def account_for(self, token):
+        address = self.tokens.get(token)
+        return (address, self.accounts[address]) if address else (None, None)
+
+    def raw_message(self, address, message):
+        """RFC 822 source padded to roughly config.message_size bytes"""
+        headers = (
+            f"From: {message['from']['address']}\r\n"
+            f"To: {address}\r\n"
+            f"Subject: {message['subject']}\r\n"
+            f"Message-ID: {message['msgid']}\r\n"
+            f"Date: {message['createdAt']}\r\n"
+            "Content-Type: text/plain; charset=utf-8\r\n\r\n"
+            f"{message['intro']}\r\n"
+        ).encode()
+        filler = max(0, self.config.message_size - len(headers))
+        line = b"Lorem ipsum dolor sit amet, consectetur adipiscing elit.\r\n"
+        return headers + (line * (filler // len(line) + 1))[:filler]
+
+class FakeMailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeMailTm/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> FakeMailState:
+        return self.server.state
+
+    def _send(self, status, body=b"", content_type="application/ld+json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def _simulate(self):
+        """Apply latency and injected failures; True if a failure was already sent"""
+        config = self.state.config
+        with self.state._lock:
+            self.state.requests += 1
+        delay = config.latency + random.uniform(-config.jitter, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self._send(429, {"detail": "Too many requests"}, headers={"Retry-After": "1"})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send(503, {"detail": "Injected failure"})
+            return True
+        return False
+
+    def _authed(self):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        address, account = self.state.account_for(token)
+        if account is None:
+            self._send(401, {"code": 401, "message": "Invalid JWT Token"})
+        return address, account
+
+    def do_POST(self):
+        body = self._json_body()
+        if self._simulate():
+            return
+        path = urlsplit(self.path).path
+        if path == "/accounts":
+            address, password = body.get("address"), body.get("password")
+            if not address or not password or address.split('@')[-1] not in self.state.config.domains:
+                return self._send(422, {"detail": "address: This value is not valid."})
+            account = self.state.create_account(address, password)
+            if account is None:
+                return self._send(422, {"detail": "address: This value is already used."})
+            return self._send(201, {"id": account["id"], "address": address, "quota": 40000000, "used": 0})
+        if path == "/token":
+            issued = self.state.issue_token(body.get("address"), body.get("password"))
+            if issued is None:
+                return self._send(401, {"code": 401, "message": "Invalid credentials."})
+            token, account_id = issued
+            return self._send(200, {"id": account_id, "token": token})
+        self._send(404, {"detail": "Not Found"})
+
+    def do_GET(self):
+        if self._simulate():
+            return
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if parts == ["domains"]:
+            members = [{"id": str(i), "domain": d, "isActive": True, "isPrivate": False}
+                       for i, d in enumerate(self.state.config.domains)]
+            return self._send(200, {"hydra:member": members, "hydra:totalItems": len(members)})
+
+        address, account = self._authed()
+        if account is None:
+            return
+        if parts == [".well-known", "mercure"]:
+            return self._stream(address, account, parse_qs(url.query).get("topic", []))
+        if parts == ["me"]:
+            return self._send(200, {"id": account["id"], "address": address, "quota": 40000000, "used": 0})
+        if parts == ["messages"]:
+            page = max(1, int(parse_qs(url.query).get("page", ["1"])[0]))
+            size = self.state.config.page_size
+            messages = account["messages"]
+            return self._send(200, {
+                "hydra:member": messages[(page - 1) * size:page * size],
+                "hydra:totalItems": len(messages),
+            })
+        if len(parts) >= 2 and parts[0] == "messages":
+            message = next((m for m in account["messages"] if m["id"] == parts[1]), None)
+            if message is None:
+                return self._send(404, {"detail": "Not Found"})
+            if parts[2:] == ["download"]:
+                return self._send(200, self.state.raw_message(address, message), content_type="message/rfc822")
+            if not parts[2:]:
+                return self._send(200, {**message, "text": message["intro"], "html": []})
+        self._send(404, {"detail": "Not Found"})
+
+    def _stream(self, address, account, topics):
+        """Server-sent events for the account's topic until the client or drop_streams() ends it"""
+        if not self.state.hub_available:
+            return self._send(503, {"detail": "Hub unavailable"})
+        if f"/accounts/{account['id']}" not in topics:
+            return self._send(403, {"detail": "Topic not authorized"})
+        stream = self.state.open_stream(address, self.headers.get("Last-Event-ID"))
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            self.wfile.write(b":\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    event = stream.get(timeout=self.state.config.heartbeat)
+                except queue.Empty:
+                    self.wfile.write(b":\n\n")
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    return
+                event_id, payload = event
+                self.wfile.write(f"id: {event_id}\ndata: {json.dumps(payload)}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.state.close_stream(address, stream)
+
+class FakeMailServer(ThreadingHTTPServer):
+    """Threaded fake mail.tm server; use start()/stop() or run as a context manager"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, config: FakeMailConfig = None):
+        super().__init__((host, port), FakeMailHandler)
+        self.state = FakeMailState(config or FakeMailConfig())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def add_config_arguments(parser):
+    """Command line flags for FakeMailConfig, shared with benchmark.py"""
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--messages", type=int, default=30, help="messages seeded per inbox")
+    parser.add_argument("--message-size", type=int, default=4096, help="raw message size in bytes")
+
+def config_from_args(args):
+    return FakeMailConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, messages_per_inbox=args.messages,
+        message_size=args.message_size
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = FakeMailServer(args.host, args.port, config_from_args(args))
+    print(f"Fake mail.tm listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
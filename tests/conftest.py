@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from fake_mailtm import FakeMailConfig, FakeMailServer
+
+@pytest.fixture(autouse=True)
+def isolated_client():
+    """Private rate limit bucket and an in-memory account store for every test"""
+    main.configure_rate_limit(rate=0, state_file="")
+    main.set_account_store(main.MemoryAccountStore())
+    yield
+    main.configure_store()
+
+@pytest.fixture
+def fake_server():
+    server = FakeMailServer(config=FakeMailConfig(messages_per_inbox=0, heartbeat=0.5)).start()
+    yield server
+    server.state.drop_streams()
+    server.stop()
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield main.MemoryAccountStore()
+        return
+    store = main.SQLiteAccountStore(str(tmp_path / "accounts.sqlite"))
+    yield store
+    store.engine.dispose()
+
+def account(n, domain="example.com", token=None):
+    return {"address": f"user{n:03d}@{domain}", "password": f"pw{n}", "token": token or f"token{n}",
+            "token_expires_at": None}
+
+def in_minutes(minutes):
+    return datetime.utcnow() + timedelta(minutes=minutes)
+
+def test_save_upserts_by_address(store):
+    store.save([account(1), account(2)])
+    store.save([account(1, token="fresh")])
+    assert store.count({}) == 2
+    rows, _ = store.query_page({}, None, 10, ("address", "token"))
+    assert dict(rows) == {"user001@example.com": "fresh", "user002@example.com": "token2"}
+
+def test_random_account(store):
+    assert store.random_account() is None
+    store.save([account(1), account(2, domain="other.org")])
+    assert store.random_account()["address"] in {"user001@example.com", "user002@other.org"}
+    assert store.random_account(regex="other")["address"] == "user002@other.org"
+    assert store.random_account(regex="nowhere") is None
+
+def test_query_page_cursor_walks_every_row_once(store):
+    store.save([account(n) for n in range(25)])
+    store.save([account(n, domain="other.org") for n in range(5)])
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = store.query_page({"domain": "example.com"}, cursor, 7, ("address",))
+        seen += [address for (address,) in rows]
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 4
+    assert sorted(seen) == sorted(a["address"] for a in map(account, range(25)))
+    # Rows saved in one batch share created_at, so newest first falls back to the id
+    assert seen == [account(n)["address"] for n in reversed(range(25))]
+    assert store.count({"domain": "example.com"}) == 25
+    assert store.count({"search": "user00"}) == 15
+
+def test_claim_renew_release(store):
+    store.save([account(n) for n in range(10)])
+    first = {a["address"] for a in store.claim("a", 6, in_minutes(5))}
+    second = {a["address"] for a in store.claim("b", 6, in_minutes(5))}
+    assert len(first) == 6 and len(second) == 4
+    assert not first & second
+    assert store.claim("c", 1, in_minutes(5)) == []
+
+    address = next(iter(first))
+    assert store.renew("a", address, in_minutes(10))
+    assert not store.renew("b", address, in_minutes(10))
+
+    assert store.release("b", [address]) == 0
+    assert store.release("a", list(first)) == 6
+    assert {a["address"] for a in store.claim("c", 10, in_minutes(5))} == first
+
+def test_expired_leases_can_be_claimed_but_not_renewed(store):
+    store.save([account(1)])
+    [claimed] = store.claim("a", 1, in_minutes(-1))
+    assert not store.renew("a", claimed["address"], in_minutes(5))
+    assert [a["address"] for a in store.claim("b", 1, in_minutes(5))] == [claimed["address"]]
+
+def test_claim_with_regex(store):
+    store.save([account(1), account(2, domain="other.org")])
+    assert [a["address"] for a in store.claim("a", 5, in_minutes(5), regex="other")] == ["user002@other.org"]
+
+def test_expiring(store):
+    now = datetime.utcnow()
+    rows = [account(n) for n in range(3)]
+    rows[0]["token_expires_at"] = now + timedelta(minutes=1)
+    rows[1]["token_expires_at"] = now + timedelta(hours=2)
+    store.save(rows)
+    assert [tuple(r) for r in store.expiring(now + timedelta(minutes=10), 10)] == [("user000@example.com", "pw0")]
@@ -0,0 +1,86 @@
+import os
+import threading
+
+import pytest
+
+import main
+
+def payload(writer, n):
+    return f"writer {writer} message {n} ".encode() * 50
+
+def test_instances_and_compaction_do_not_lose_appends(tmp_path):
+    folder = str(tmp_path / "archive")
+
+    def append(writer):
+        archive = main.MailArchive(folder, segment_size=4096)
+        for n in range(40):
+            archive.append(f"{writer}-{n}", payload(writer, n))
+            if n % 5 == 0:
+                archive.delete(f"{writer}-{n}")
+        archive.close()
+
+    def compact(stop):
+        archive = main.MailArchive(folder, segment_size=4096)
+        while not stop.is_set():
+            archive.compact()
+        archive.close()
+
+    stop = threading.Event()
+    compactor = threading.Thread(target=compact, args=(stop,))
+    writers = [threading.Thread(target=append, args=(w,)) for w in range(4)]
+    compactor.start()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    compactor.join()
+
+    archive = main.MailArchive(folder, segment_size=4096)
+    expected = {f"{w}-{n}" for w in range(4) for n in range(40) if n % 5}
+    assert set(archive.message_ids()) == expected
+    for message_id in expected:
+        writer, n = map(int, message_id.split("-"))
+        assert archive.read(message_id) == payload(writer, n)
+    assert archive.dead_bytes() == 0 or archive.compact() == len(expected)
+    archive.close()
+
+@pytest.mark.skipif(main.fcntl is None or not hasattr(os, "fork"), reason="needs fork and flock")
+def test_processes_share_one_archive(tmp_path):
+    folder = str(tmp_path / "archive")
+    main.MailArchive(folder).close()
+    children = []
+    for writer in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                archive = main.MailArchive(folder, segment_size=8192)
+                for n in range(30):
+                    archive.append(f"{writer}-{n}", payload(writer, n))
+                archive.close()
+            finally:
+                os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+    archive = main.MailArchive(folder)
+    assert archive.rebuild_index() == 90  # every record in the segments is intact
+    for writer in range(3):
+        for n in range(30):
+            assert archive.read(f"{writer}-{n}") == payload(writer, n)
+    archive.close()
+
+def test_compact_if_needed_waits_for_the_threshold(tmp_path):
+    archive = main.MailArchive(str(tmp_path / "archive"))
+    for n in range(10):
+        archive.append(str(n), payload(0, n))
+    for n in range(4):
+        archive.delete(str(n))
+    assert archive.compact_if_needed() is None
+    archive.delete("4")
+    archive.delete("5")
+    assert archive.compact_if_needed() == 4
+    assert archive.dead_bytes() == 0
+    assert archive.read("9") == payload(0, 9)
+    archive.close()
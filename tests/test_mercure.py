@@ -0,0 +1,72 @@
+import time
+
+import main
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def new_account(server):
+    mail = main.temp_mail(base_url=server.url)
+    assert not isinstance(mail.get_account(), main.Failure)
+    assert not isinstance(mail.get_token(save=False), main.Failure)
+    return mail
+
+def subscriber_for(server):
+    watcher = main.InboxWatcher(min_interval=0.1, max_interval=0.2)
+    return main.MercureSubscriber(hub_url=f"{server.url}/.well-known/mercure", watcher=watcher,
+                                  reconnect_delay=0.1, max_reconnect_delay=0.2, read_timeout=5)
+
+def next_subject(subscriber, timeout=5.0):
+    for _mail, message in subscriber.events(timeout=timeout):
+        return message["subject"]
+    return None
+
+def test_push_delivers_new_messages(fake_server):
+    mail = new_account(fake_server)
+    subscriber = subscriber_for(fake_server).subscribe(mail)
+    try:
+        assert wait_until(lambda: fake_server.state.streams.get(mail.adress))
+        fake_server.state.add_message(mail.adress, subject="pushed")
+        assert next_subject(subscriber) == "pushed"
+        assert mail.adress not in subscriber._polling
+    finally:
+        subscriber.stop()
+
+def test_dropped_stream_falls_back_to_polling_and_reconnects(fake_server):
+    mail = new_account(fake_server)
+    fake_server.state.add_message(mail.adress, subject="already there")
+    subscriber = subscriber_for(fake_server).subscribe(mail)
+    try:
+        assert wait_until(lambda: fake_server.state.streams.get(mail.adress))
+        fake_server.state.hub_available = False
+        fake_server.state.drop_streams()
+        assert wait_until(lambda: mail.adress in subscriber._polling)
+        # Fallback polling starts from the inbox as it is, without replaying it
+        assert wait_until(lambda: subscriber.watcher._watched[mail.adress]["seen"] is not None)
+        fake_server.state.add_message(mail.adress, subject="polled")
+        assert next_subject(subscriber) == "polled"
+
+        fake_server.state.hub_available = True
+        assert wait_until(lambda: mail.adress not in subscriber._polling)
+        fake_server.state.add_message(mail.adress, subject="pushed again")
+        assert next_subject(subscriber) == "pushed again"
+        # Last-Event-ID replays "polled" on reconnect; it must not be delivered twice
+        assert next_subject(subscriber, timeout=0.5) is None
+    finally:
+        subscriber.stop()
+
+def test_unsubscribe_closes_the_stream(fake_server):
+    mail = new_account(fake_server)
+    subscriber = subscriber_for(fake_server).subscribe(mail)
+    try:
+        assert wait_until(lambda: fake_server.state.streams.get(mail.adress))
+        subscriber.unsubscribe(mail.adress)
+        fake_server.state.add_message(mail.adress, subject="after unsubscribe")
+        assert wait_until(lambda: not fake_server.state.streams.get(mail.adress))
+    finally:
+        subscriber.stop()
@@ -0,0 +1,49 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+import requests
+
+import main
+
+@pytest.fixture
+def dead_url():
+    """Base URL of a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+def assert_network_failure(result):
+    assert isinstance(result, main.Failure)
+    assert isinstance(result.error, main.NetworkError)
+    assert result.status is None
+    assert result.elapsed is not None
+
+def test_sync_calls_return_network_failures(dead_url):
+    mail = main.temp_mail("user@example.com", "secret", token="token", session=requests.Session(),
+                          base_url=dead_url)
+    for call in (mail.get_domains, mail.get_account, mail.get_token, mail.get_me,
+                 mail.get_messages, lambda: mail.get_message("1")):
+        assert_network_failure(call())
+    assert_network_failure(mail.download_message("1"))
+
+def test_async_calls_return_network_failures(dead_url):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            mail = main.AsyncTempMail("user@example.com", "secret", token="token", client=client,
+                                      semaphore=asyncio.Semaphore(4), base_url=dead_url)
+            return [await mail.get_domains(), await mail.get_account(), await mail.get_token(),
+                    await mail.get_messages()]
+
+    for result in asyncio.run(run()):
+        assert_network_failure(result)
+
+def test_ui_reports_unreachable_api(dead_url, monkeypatch):
+    monkeypatch.setattr(main, "API_BASE_URL", dead_url)
+    monkeypatch.setattr(main, "_session", requests.Session())  # no transport-level retries
+    main.domain_cache.invalidate()
+    rows, status = main.check_messages("user@example.com", "secret", "token")
+    assert rows == [] and status.startswith("Failed to get messages")
+    assert main.create_random_account()[3].startswith("Failed to create account")
@@ -0,0 +1,23 @@
+import os
+import time
+
+import pytest
+
+from main import SharedRateLimiter, fcntl
+
+
+@pytest.mark.skipif(fcntl is None or not hasattr(os, "fork"), reason="needs fork and flock")
+def test_forked_child_does_not_share_the_parents_flock(tmp_path):
+    limiter = SharedRateLimiter(str(tmp_path / "bucket"), rate=1000)
+    limiter.acquire()  # opens the state file in the parent
+    fcntl.flock(limiter._fd, fcntl.LOCK_EX)
+    pid = os.fork()
+    if pid == 0:
+        started = time.monotonic()
+        with limiter._locked():
+            waited = time.monotonic() - started
+        os._exit(0 if waited >= 0.3 else 1)
+    time.sleep(0.5)
+    fcntl.flock(limiter._fd, fcntl.LOCK_UN)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
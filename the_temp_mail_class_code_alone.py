@@ -3,6 +3,7 @@ import string
 import os
 import time
 import json
+import tempfile
 import requests
 import pandas as pd
 import mariadb
@@ -92,7 +93,7 @@ class temp_mail():
                  i.get('intro', 'not found'), 
                  i.get('id', 'not found')) for i in messages]
 
-    def download_message(self, message_id, base_path=os.getcwd()):
+    def download_message(self, message_id, base_path=os.getcwd(), max_bytes=50 * 1024 * 1024):
         """Download a single message by ID into a folder named after the email address"""
         if self.token is None:
             self.get_token()
@@ -106,20 +107,31 @@ class temp_mail():
         
         download_url = f"https://api.mail.tm/messages/{message_id}/download"
         headers = {"Authorization": f"Bearer {self.token}"}
-        response = requests.get(url=download_url, headers=headers)
-        
-        if response.status_code == 200:
+        with requests.get(url=download_url, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                return f"Failed to download message {message_id}: HTTP {response.status_code}"
+
             # Create a more informative filename with timestamp and message ID
             filename = f"email_{time.strftime('%Y%m%d_%H%M%S')}_{message_id}.eml"
             filepath = os.path.join(folder_path, filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+
+            # Stream to a temporary file and rename it into place once complete
+            fd, tmp_path = tempfile.mkstemp(dir=folder_path, suffix=".part")
+            try:
+                written = 0
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        written += len(chunk)
+                        if max_bytes and written > max_bytes:
+                            raise ValueError(f"message exceeds {max_bytes} bytes")
+                        f.write(chunk)
+                os.replace(tmp_path, filepath)
+            except (ValueError, requests.RequestException) as e:
+                os.remove(tmp_path)
+                return f"Failed to download message {message_id}: {e}"
             return filepath
-        else:
-            return f"Failed to download message {message_id}: HTTP {response.status_code}"
 
-    def download_messages(self, base_path=os.getcwd()):
+    def download_messages(self, base_path=os.getcwd(), max_bytes=50 * 1024 * 1024):
         """Download all messages for the current account into a folder named after the email address"""
         if self.token is None:
             token_result = self.get_token()
@@ -149,7 +161,7 @@ class temp_mail():
             if not msg_id:
                 continue
             
-            result = self.download_message(msg_id, base_path)
+            result = self.download_message(msg_id, base_path, max_bytes)
             if result.startswith("Failed"):
                 failed_downloads.append(result)
             else: